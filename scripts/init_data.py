@@ -7,6 +7,7 @@ scripts/init_data.py
 """
 
 import random
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 import mysql.connector
@@ -25,6 +26,12 @@ def get_connection():
     )
 
 
+def batch_insert(cursor, sql: str, rows: list, chunk_size: int = 1000):
+    """分片executemany批量插入，单次往返写入一批行并控制包大小"""
+    for i in range(0, len(rows), chunk_size):
+        cursor.executemany(sql, rows[i:i + chunk_size])
+
+
 def init_weather_data():
     """初始化天气数据"""
     print("📊 初始化天气数据...")
@@ -36,38 +43,46 @@ def init_weather_data():
     weathers = ["晴", "多云", "阴", "小雨", "中雨", "雷阵雨"]
     base_date = datetime.now().date()
 
-    count = 0
+    sql = """
+    INSERT INTO weather_data (
+        city, fx_date, temp_max, temp_min, text_day, text_night,
+        humidity, wind_dir_day, wind_scale_day, precip, uv_index
+    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE temp_max = VALUES(temp_max)
+    """
+
+    # 批量抽样各随机列：每列一次choices调用，替代每行多次choice
+    n = len(cities) * 30
+    day_weathers = random.choices(weathers, k=n)
+    night_weathers = random.choices(weathers, k=n)
+    wind_dirs = random.choices(["东风", "西风", "南风", "北风"], k=n)
+    wind_scales = random.choices(["1-2", "3-4", "4-5"], k=n)
+
+    rows = []
     for city in cities:
         temp_base = {"北京": 5, "上海": 10, "广州": 18, "深圳": 20}[city]
 
         for i in range(30):
+            idx = len(rows)
             fx_date = base_date + timedelta(days=i)
             temp_max = temp_base + random.randint(5, 15)
             temp_min = temp_base + random.randint(-5, 5)
 
-            sql = """
-            INSERT INTO weather_data (
-                city, fx_date, temp_max, temp_min, text_day, text_night,
-                humidity, wind_dir_day, wind_scale_day, precip, uv_index
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ON DUPLICATE KEY UPDATE temp_max = VALUES(temp_max)
-            """
-
-            cursor.execute(sql, (
+            rows.append((
                 city, fx_date, temp_max, temp_min,
-                random.choice(weathers), random.choice(weathers),
+                day_weathers[idx], night_weathers[idx],
                 random.randint(30, 90),
-                random.choice(["东风", "西风", "南风", "北风"]),
-                random.choice(["1-2", "3-4", "4-5"]),
+                wind_dirs[idx],
+                wind_scales[idx],
                 round(random.uniform(0, 10), 1),
                 random.randint(1, 10)
             ))
-            count += 1
 
+    batch_insert(cursor, sql, rows)
     conn.commit()
     cursor.close()
     conn.close()
-    print(f"  ✅ 天气数据: {count} 条")
+    print(f"  ✅ 天气数据: {len(rows)} 条")
 
 
 def init_train_tickets():
@@ -84,40 +99,42 @@ def init_train_tickets():
         ("成都", "重庆", ["G8501", "G8503", "G8505"], 100, 65.00, 104.00),
     ]
 
-    times = ["07:00", "09:00", "11:00", "14:00", "16:00", "18:00"]
+    # (时, 分)元组，内层循环直接解包，免去每行的字符串切分
+    times = [(7, 0), (9, 0), (11, 0), (14, 0), (16, 0), (18, 0)]
     base_date = datetime.now()
 
-    count = 0
+    sql = """
+    INSERT INTO train_tickets (
+        departure_city, arrival_city, departure_time, arrival_time,
+        train_number, seat_type, total_seats, remaining_seats, price
+    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE remaining_seats = VALUES(remaining_seats)
+    """
+
+    rows = []
     for dep, arr, trains, duration, price2, price1 in routes:
+        seat_types = [("二等座", price2), ("一等座", price1)]
+        duration_td = timedelta(minutes=duration)
+
         for train in trains:
             for day_offset in range(7):
-                for time_str in random.sample(times, 3):
+                for hour, minute in random.sample(times, 3):
                     dep_time = (base_date + timedelta(days=day_offset)).replace(
-                        hour=int(time_str.split(":")[0]),
-                        minute=int(time_str.split(":")[1]),
-                        second=0, microsecond=0
+                        hour=hour, minute=minute, second=0, microsecond=0
                     )
-                    arr_time = dep_time + timedelta(minutes=duration)
-
-                    for seat_type, price in [("二等座", price2), ("一等座", price1)]:
-                        sql = """
-                        INSERT INTO train_tickets (
-                            departure_city, arrival_city, departure_time, arrival_time,
-                            train_number, seat_type, total_seats, remaining_seats, price
-                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                        ON DUPLICATE KEY UPDATE remaining_seats = VALUES(remaining_seats)
-                        """
-
-                        cursor.execute(sql, (
+                    arr_time = dep_time + duration_td
+
+                    for seat_type, price in seat_types:
+                        rows.append((
                             dep, arr, dep_time, arr_time, train, seat_type,
                             random.randint(500, 1000), random.randint(50, 500), price
                         ))
-                        count += 1
 
+    batch_insert(cursor, sql, rows)
     conn.commit()
     cursor.close()
     conn.close()
-    print(f"  ✅ 火车票数据: {count} 条")
+    print(f"  ✅ 火车票数据: {len(rows)} 条")
 
 
 def init_flight_tickets():
@@ -133,46 +150,46 @@ def init_flight_tickets():
         ("深圳", "北京", ["CA1801", "MU5801", "CZ3801"], 180, 1000, 2500, 5000),
     ]
 
-    times = ["08:00", "10:00", "13:00", "15:00", "18:00", "20:00"]
+    # (时, 分)元组，内层循环直接解包，免去每行的字符串切分
+    times = [(8, 0), (10, 0), (13, 0), (15, 0), (18, 0), (20, 0)]
     base_date = datetime.now()
 
-    count = 0
+    sql = """
+    INSERT INTO flight_tickets (
+        departure_city, arrival_city, departure_time, arrival_time,
+        flight_number, cabin_type, total_seats, remaining_seats, price
+    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE remaining_seats = VALUES(remaining_seats)
+    """
+
+    rows = []
     for dep, arr, flights, duration, eco_price, biz_price, first_price in routes:
+        duration_td = timedelta(minutes=duration)
+        cabins = [
+            ("经济舱", eco_price, 150, 80),
+            ("商务舱", biz_price, 30, 15),
+            ("头等舱", first_price, 8, 4),
+        ]
+
         for flight in flights:
             for day_offset in range(7):
-                for time_str in random.sample(times, 2):
+                for hour, minute in random.sample(times, 2):
                     dep_time = (base_date + timedelta(days=day_offset)).replace(
-                        hour=int(time_str.split(":")[0]),
-                        minute=int(time_str.split(":")[1]),
-                        second=0, microsecond=0
+                        hour=hour, minute=minute, second=0, microsecond=0
                     )
-                    arr_time = dep_time + timedelta(minutes=duration)
-
-                    cabins = [
-                        ("经济舱", eco_price, 150, 80),
-                        ("商务舱", biz_price, 30, 15),
-                        ("头等舱", first_price, 8, 4),
-                    ]
+                    arr_time = dep_time + duration_td
 
                     for cabin, price, total, remain in cabins:
-                        sql = """
-                        INSERT INTO flight_tickets (
-                            departure_city, arrival_city, departure_time, arrival_time,
-                            flight_number, cabin_type, total_seats, remaining_seats, price
-                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                        ON DUPLICATE KEY UPDATE remaining_seats = VALUES(remaining_seats)
-                        """
-
-                        cursor.execute(sql, (
+                        rows.append((
                             dep, arr, dep_time, arr_time, flight, cabin,
                             total, random.randint(0, remain), price
                         ))
-                        count += 1
 
+    batch_insert(cursor, sql, rows)
     conn.commit()
     cursor.close()
     conn.close()
-    print(f"  ✅ 机票数据: {count} 条")
+    print(f"  ✅ 机票数据: {len(rows)} 条")
 
 
 def init_concert_tickets():
@@ -191,7 +208,15 @@ def init_concert_tickets():
 
     base_date = datetime.now()
 
-    count = 0
+    sql = """
+    INSERT INTO concert_tickets (
+        artist, city, venue, start_time, end_time,
+        ticket_type, total_seats, remaining_seats, price
+    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE remaining_seats = VALUES(remaining_seats)
+    """
+
+    rows = []
     for artist, city, venue, p1, p2, p3, p4 in concerts:
         for day_offset in [7, 14, 21]:
             start_time = (base_date + timedelta(days=day_offset)).replace(
@@ -207,24 +232,16 @@ def init_concert_tickets():
             ]
 
             for ticket_type, price, total, remain in tickets:
-                sql = """
-                INSERT INTO concert_tickets (
-                    artist, city, venue, start_time, end_time,
-                    ticket_type, total_seats, remaining_seats, price
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON DUPLICATE KEY UPDATE remaining_seats = VALUES(remaining_seats)
-                """
-
-                cursor.execute(sql, (
+                rows.append((
                     artist, city, venue, start_time, end_time,
                     ticket_type, total, random.randint(0, remain), price
                 ))
-                count += 1
 
+    batch_insert(cursor, sql, rows)
     conn.commit()
     cursor.close()
     conn.close()
-    print(f"  ✅ 演唱会票数据: {count} 条")
+    print(f"  ✅ 演唱会票数据: {len(rows)} 条")
 
 
 def main():
@@ -234,10 +251,16 @@ def main():
     print("=" * 60)
 
     try:
-        init_weather_data()
-        init_train_tickets()
-        init_flight_tickets()
-        init_concert_tickets()
+        # 四个加载器写入互不相关的表且各自持有独立连接，并行执行
+        loaders = [
+            init_weather_data,
+            init_train_tickets,
+            init_flight_tickets,
+            init_concert_tickets,
+        ]
+        with ThreadPoolExecutor(max_workers=len(loaders)) as pool:
+            for future in [pool.submit(loader) for loader in loaders]:
+                future.result()
 
         print("\n" + "=" * 60)
         print("✅ 数据初始化完成!")
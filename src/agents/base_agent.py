@@ -6,17 +6,48 @@ src/agents/base_agent.py
 所有A2A Agent的抽象基类，提供通用功能
 """
 
+import asyncio
+import threading
+import time
 from abc import ABC, abstractmethod
+from functools import singledispatch
 from typing import Dict, Any, Optional, List
 from datetime import datetime
+from zoneinfo import ZoneInfo
 
 from python_a2a import A2AServer, AgentCard, AgentSkill, TaskStatus, TaskState
 from langchain_openai import ChatOpenAI
-import pytz
 
 from src.config import config, logger
 
 
+@singledispatch
+def _extract_content(content) -> str:
+    """按content类型提取文本，分派结果按类型缓存；未知类型返回空串"""
+    return ""
+
+
+@_extract_content.register
+def _(content: str) -> str:
+    return content
+
+
+@_extract_content.register
+def _(content: list) -> str:
+    for item in content:
+        text = getattr(item, 'text', None)
+        if text is not None:
+            return text
+        if isinstance(item, dict) and 'text' in item:
+            return item['text']
+    return ""
+
+
+@_extract_content.register
+def _(content: dict) -> str:
+    return content.get('text', "")
+
+
 class BaseAgent(A2AServer, ABC):
     """
     Agent抽象基类
@@ -37,7 +68,14 @@ class BaseAgent(A2AServer, ABC):
         """
         super().__init__(agent_card=agent_card)
         self.agent_card = agent_card
-        self.timezone = pytz.timezone(config.timezone)
+        self.timezone = ZoneInfo(config.timezone)
+        # 时间字符串缓存：(时间戳, 日期, 日期时间)，秒级粒度，
+        # 同一秒内的多次访问不重复做时区换算和格式化
+        self._time_cache = (0.0, "", "")
+        # 常驻工作事件循环（懒启动）：MCP会话、HTTP连接池、批处理器
+        # 等对象都绑定创建时的循环，必须始终在同一个循环上运行
+        self._worker_loop = None
+        self._worker_loop_lock = threading.Lock()
         
         # 初始化LLM
         self.llm = ChatOpenAI(
@@ -50,15 +88,27 @@ class BaseAgent(A2AServer, ABC):
         
         logger.info(f"{self.agent_card.name} 初始化完成")
     
+    def _refresh_time_cache(self) -> tuple:
+        """秒级刷新时间字符串缓存"""
+        now = time.time()
+        if now - self._time_cache[0] >= 1.0:
+            dt = datetime.now(self.timezone)
+            self._time_cache = (
+                now,
+                dt.strftime('%Y-%m-%d'),
+                dt.strftime('%Y-%m-%d %H:%M:%S')
+            )
+        return self._time_cache
+
     @property
     def current_date(self) -> str:
-        """获取当前日期字符串"""
-        return datetime.now(self.timezone).strftime('%Y-%m-%d')
-    
+        """获取当前日期字符串（秒级缓存）"""
+        return self._refresh_time_cache()[1]
+
     @property
     def current_datetime(self) -> str:
-        """获取当前日期时间字符串"""
-        return datetime.now(self.timezone).strftime('%Y-%m-%d %H:%M:%S')
+        """获取当前日期时间字符串（秒级缓存）"""
+        return self._refresh_time_cache()[2]
     
     def extract_user_input(self, task) -> str:
         """
@@ -70,20 +120,20 @@ class BaseAgent(A2AServer, ABC):
         Returns:
             用户输入文本
         """
-        if hasattr(task, 'message') and task.message:
-            if hasattr(task.message, 'content'):
-                content = task.message.content
-                if isinstance(content, list):
-                    for item in content:
-                        if hasattr(item, 'text'):
-                            return item.text
-                        elif isinstance(item, dict) and 'text' in item:
-                            return item['text']
-                elif isinstance(content, str):
-                    return content
-            elif isinstance(task.message, str):
-                return task.message
-        return ""
+        message = getattr(task, 'message', None)
+        if not message:
+            return ""
+
+        if isinstance(message, str):
+            return message
+
+        content = getattr(message, 'content', None)
+        # 纯文本消息是最常见情况，先短路再走类型分派
+        if isinstance(content, str):
+            return content
+        if content is None:
+            return ""
+        return _extract_content(content)
     
     def create_response(
         self, 
@@ -127,19 +177,79 @@ class BaseAgent(A2AServer, ABC):
         """创建需要更多输入的响应"""
         return self.create_response(TaskState.INPUT_REQUIRED, content)
     
-    @abstractmethod
+    def _run_worker_loop(self):
+        """工作线程入口：绑定并运行常驻事件循环"""
+        asyncio.set_event_loop(self._worker_loop)
+        self._worker_loop.run_forever()
+
+    def _ensure_worker_loop(self) -> asyncio.AbstractEventLoop:
+        """获取常驻工作事件循环，首次调用时在守护线程中启动"""
+        with self._worker_loop_lock:
+            if self._worker_loop is None:
+                self._worker_loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._run_worker_loop,
+                    name=f"{self.agent_card.name}-loop",
+                    daemon=True
+                ).start()
+        return self._worker_loop
+
     async def handle_task(self, task) -> TaskStatus:
         """
-        处理任务的抽象方法，子类必须实现
-        
+        A2A入口：把任务派发到常驻事件循环执行
+
+        python_a2a的WSGI服务器为每个请求桥接一个临时事件循环，
+        而MCP会话、HTTP连接池等状态绑定创建时的循环，跨循环使用
+        会悬挂。所有任务统一派发到同一个常驻循环上运行。
+
         Args:
             task: A2A任务对象
-            
+
+        Returns:
+            TaskStatus对象
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self.process_task(task), self._ensure_worker_loop()
+        )
+        return await asyncio.wrap_future(future)
+
+    async def _shutdown_async(self):
+        """常驻循环上的异步清理，子类可覆写补充动作"""
+        close_all = getattr(self, "close_all_mcp_sessions", None)
+        if close_all is not None:
+            await close_all()
+
+    def shutdown(self):
+        """
+        服务停止时的同步收尾入口
+
+        把异步清理（如排空MCP会话池）派发到常驻循环执行，
+        完成后停掉循环；循环从未启动过时直接返回
+        """
+        loop = self._worker_loop
+        if loop is None or not loop.is_running():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(
+                self._shutdown_async(), loop
+            ).result(timeout=5)
+        except Exception as e:
+            logger.debug(f"收尾清理失败: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+
+    @abstractmethod
+    async def process_task(self, task) -> TaskStatus:
+        """
+        处理任务的抽象方法，子类必须实现（在常驻循环上执行）
+
+        Args:
+            task: A2A任务对象
+
         Returns:
             TaskStatus对象
         """
         pass
-    
+
     @abstractmethod
     def get_welcome_message(self) -> str:
         """获取欢迎消息，子类必须实现"""
@@ -149,44 +259,103 @@ class BaseAgent(A2AServer, ABC):
 class MCPClientMixin:
     """
     MCP客户端混入类
-    
-    提供MCP服务调用的通用方法
+
+    提供MCP服务调用的通用方法。每个MCP地址维持一个已初始化的
+    长连接会话，把initialize握手成本摊薄到多次调用上
     """
-    
+
+    def _mcp_state(self):
+        """懒初始化会话池和锁（混入类没有自己的__init__）"""
+        if not hasattr(self, "_mcp_sessions"):
+            # mcp_url -> (AsyncExitStack, ClientSession)
+            self._mcp_sessions = {}
+            self._mcp_lock = asyncio.Lock()
+        return self._mcp_sessions, self._mcp_lock
+
+    async def _ensure_mcp_session(self, mcp_url: str):
+        """
+        获取指定MCP地址的持久会话，必要时建立连接并初始化
+
+        Args:
+            mcp_url: MCP服务URL
+
+        Returns:
+            已初始化的ClientSession
+        """
+        from contextlib import AsyncExitStack
+        from mcp import ClientSession
+        from mcp.client.streamable_http import streamablehttp_client
+
+        sessions, lock = self._mcp_state()
+        async with lock:
+            entry = sessions.get(mcp_url)
+            if entry is not None:
+                return entry[1]
+
+            stack = AsyncExitStack()
+            try:
+                read, write, _ = await stack.enter_async_context(
+                    streamablehttp_client(mcp_url)
+                )
+                session = await stack.enter_async_context(ClientSession(read, write))
+                await session.initialize()
+            except Exception:
+                await stack.aclose()
+                raise
+
+            sessions[mcp_url] = (stack, session)
+            logger.info(f"MCP会话已建立: {mcp_url}")
+            return session
+
+    async def _close_mcp_session(self, mcp_url: str):
+        """关闭并丢弃指定地址的会话，下次调用时懒重连"""
+        sessions, _ = self._mcp_state()
+        entry = sessions.pop(mcp_url, None)
+        if entry is not None:
+            try:
+                await entry[0].aclose()
+            except Exception as e:
+                logger.debug(f"关闭MCP会话失败: {e}")
+
+    async def close_all_mcp_sessions(self):
+        """关闭所有MCP会话（服务停止时调用）"""
+        sessions, _ = self._mcp_state()
+        for mcp_url in list(sessions):
+            await self._close_mcp_session(mcp_url)
+
     async def call_mcp_tool(
-        self, 
-        mcp_url: str, 
-        tool_name: str, 
+        self,
+        mcp_url: str,
+        tool_name: str,
         params: Dict[str, Any]
     ) -> Dict[str, Any]:
         """
         调用MCP工具
-        
+
         Args:
             mcp_url: MCP服务URL
             tool_name: 工具名称
             params: 工具参数
-            
+
         Returns:
             调用结果
         """
-        from mcp import ClientSession
-        from mcp.client.streamable_http import streamablehttp_client
-        
         try:
-            async with streamablehttp_client(mcp_url) as (read, write, _):
-                async with ClientSession(read, write) as session:
-                    await session.initialize()
-                    logger.debug(f"调用MCP工具: {tool_name}, 参数: {params}")
-                    
-                    result = await session.call_tool(tool_name, params)
-                    
-                    if hasattr(result, 'content') and result.content:
-                        text = result.content[0].text
-                        return {"status": "success", "data": text}
-                    else:
-                        return {"status": "success", "data": str(result)}
-                        
+            session = await self._ensure_mcp_session(mcp_url)
+
+            logger.debug(f"调用MCP工具: {tool_name}, 参数: {params}")
+            # ClientSession按请求id多路复用并发调用，无需加锁；
+            # 锁只保护会话的建立（见_ensure_mcp_session）
+            result = await session.call_tool(tool_name, params)
+
+            if hasattr(result, 'content') and result.content:
+                text = result.content[0].text
+                return {"status": "success", "data": text}
+            else:
+                return {"status": "success", "data": str(result)}
+
         except Exception as e:
             logger.error(f"MCP调用失败: {e}")
+            # 会话可能已损坏，丢弃后下次调用重建
+            await self._close_mcp_session(mcp_url)
             return {"status": "error", "message": str(e)}
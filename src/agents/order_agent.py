@@ -6,28 +6,28 @@ src/agents/order_agent.py
 处理票务预订请求，包括信息验证、余票检查、订单创建
 """
 
-import json
+import asyncio
 import re
+import sys
 import uuid
-from datetime import datetime
+from collections import OrderedDict
+from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
 import httpx
+import orjson
 
 from python_a2a import AgentCard, AgentSkill, TaskStatus, TaskState
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_openai import ChatOpenAI
 
 from src.agents.base_agent import BaseAgent, MCPClientMixin
 from src.config import config, logger
 
 
 # ==================== 意图解析提示词 ====================
-INTENT_PROMPT = ChatPromptTemplate.from_template(
-    """
-你是一个订票意图解析器，需要从用户输入中提取订票相关信息。
-
-【当前日期】{current_date}
-
-【用户输入】{user_input}
+# 静态规则和示例集中在system消息并保持逐字节稳定，动态内容只留
+# 日期和用户输入，让服务端的前缀缓存能命中静态段
+INTENT_SYSTEM_PROMPT = """你是一个订票意图解析器，需要从用户输入中提取订票相关信息。
 
 【解析规则】
 1. 识别订票类型：
@@ -73,7 +73,7 @@ INTENT_PROMPT = ChatPromptTemplate.from_template(
 }}
 
 【示例】
-用户：订一张明天北京到上海的高铁票，二等座，张三，13800138000
+用户（当前日期2026-01-18）：订一张明天北京到上海的高铁票，二等座，张三，13800138000
 输出：
 {{
     "status": "ready",
@@ -93,9 +93,193 @@ INTENT_PROMPT = ChatPromptTemplate.from_template(
     }}
 }}
 """
+
+INTENT_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", INTENT_SYSTEM_PROMPT),
+    ("user", "【当前日期】{current_date}\n【用户输入】{user_input}")
+])
+
+
+# 批量意图解析Prompt：把并发到达的多条输入合并为一次LLM调用
+BATCH_INTENT_PROMPT = ChatPromptTemplate.from_template(
+    """
+你是一个订票意图解析器，需要分别解析下面每一条用户输入。
+
+【当前日期】{current_date}
+
+【用户输入列表】
+{numbered_inputs}
+
+【解析规则】
+与单条解析一致：识别订票类型（火车票/高铁票→"train"、机票/飞机票→"flight"、
+演唱会票→"concert"），提取查询参数、联系人信息（姓名、电话、身份证号）和票务ID。
+
+【输出格式】
+输出JSON对象：{{"results": [第1条的解析结果, 第2条的解析结果, ...]}}
+信息足够时单条格式为：
+{{"status": "ready", "ticket_type": "train/flight/concert", "query_params": {{...}}, "ticket_id": null, "quantity": 1, "contact": {{"name": "...", "phone": "...", "id_card": "..."}}}}
+缺少必要信息时单条格式为：
+{{"status": "input_required", "message": "需要补充的具体信息", "missing_fields": ["缺少的字段"]}}
+"""
 )
 
 
+class IntentBatcher:
+    """
+    意图解析微批处理器
+
+    将短窗口内到达的解析请求合并为一次LLM调用，
+    摊薄每次请求的网络往返与解码开销。可按预期输出长度
+    分桶凑批，避免短输出在解码阶段等待同批的长输出
+    """
+
+    def __init__(self, parse_batch, classify=None,
+                 max_batch: int = 8, max_wait_ms: float = 15):
+        """
+        初始化批处理器
+
+        Args:
+            parse_batch: 异步批量解析函数 List[str] -> List[dict]
+            classify: 可选分桶函数 str -> str，同桶的请求才合并为一批
+            max_batch: 单批最大条数
+            max_wait_ms: 凑批等待窗口（毫秒）
+        """
+        self._parse_batch = parse_batch
+        self._classify = classify
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+
+    async def parse(self, user_input: str) -> Dict[str, Any]:
+        """提交一条输入，等待所在批次的解析结果"""
+        bucket = self._classify(user_input) if self._classify else ""
+
+        queue = self._queues.get(bucket)
+        if queue is None:
+            queue = self._queues[bucket] = asyncio.Queue()
+
+        worker = self._workers.get(bucket)
+        if worker is None or worker.done():
+            self._workers[bucket] = asyncio.create_task(self._run(queue))
+
+        future = asyncio.get_running_loop().create_future()
+        await queue.put((user_input, future))
+        return await future
+
+    async def _run(self, queue: asyncio.Queue):
+        """单个桶的后台凑批循环"""
+        while True:
+            batch = [await queue.get()]
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            inputs = [item[0] for item in batch]
+            try:
+                results = await self._parse_batch(inputs)
+                for (_, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+
+# markdown代码块提取：单次扫描取出围栏内的JSON（JSON模式下仅兜底用）
+FENCE_RE = re.compile(r"```(?:json)?\s*(\{.*\}|\[.*\])\s*```", re.S)
+
+
+def _looks_complete_json(text: str) -> bool:
+    """
+    判断文本中的JSON对象是否已闭合
+
+    用括号深度计数（跳过字符串字面量）代替试解析，
+    供流式输出在拿到完整对象后提前停止
+    """
+    depth = 0
+    in_str = False
+    escape = False
+    started = False
+    for ch in text:
+        if escape:
+            escape = False
+        elif in_str:
+            if ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_str = False
+        elif ch == '"':
+            in_str = True
+        elif ch == '{':
+            depth += 1
+            started = True
+        elif ch == '}':
+            depth -= 1
+            if started and depth == 0:
+                return True
+    return False
+
+
+# ==================== 意图快速解析 ====================
+# 结构明确的输入（带票务ID、联系人、电话）直接正则解析，跳过LLM
+TICKET_ID_RE = re.compile(r"票务ID[:：]?\s*(\d+)")
+QTY_RE = re.compile(r"(\d+)\s*张")
+PHONE_RE = re.compile(r"1[3-9]\d{9}")
+ID_CARD_RE = re.compile(r"\d{17}[\dXx]")
+TICKET_TYPE_RE = re.compile(r"高铁|火车|机票|飞机|演唱会")
+# 联系人姓名：紧挨在手机号前、以逗号分隔的2-4个汉字
+NAME_RE = re.compile(r"[，,]\s*([一-龥]{2,4})\s*[，,]\s*1[3-9]\d{9}")
+# 无票响应判定：一次扫描替代多个子串查找
+NO_TICKET_RE = re.compile(r"未找到|没有")
+
+# 路线型快速解析：已知城市对 + 日期词，覆盖"明天北京到上海的高铁"类输入
+CITY_ALT = "北京|上海|广州|深圳|杭州|成都|重庆"
+ROUTE_RE = re.compile(f"({CITY_ALT})(?:到|飞|至)({CITY_ALT})")
+# 大后天必须排在后天之前：正则alternation按从左到右取第一个命中，
+# 否则"大后天"会命中内嵌的"后天"，订到提前一天的票
+DATE_WORD_RE = re.compile(r"\d{4}-\d{2}-\d{2}|今天|明天|大后天|后天")
+SEAT_RE = re.compile(r"二等座|一等座|商务座|经济舱|商务舱|头等舱")
+DATE_OFFSETS = {"今天": 0, "明天": 1, "大后天": 3, "后天": 2}
+
+TICKET_TYPE_MAP = {
+    "高铁": "train",
+    "火车": "train",
+    "机票": "flight",
+    "飞机": "flight",
+    "演唱会": "concert"
+}
+
+# 余票查询文本模板：按票类型给出字段顺序和格式
+QUERY_SPECS = {
+    "train": ("查询火车票", (
+        ("date", "{}"),
+        ("departure_city", "{}"),
+        ("arrival_city", "到{}"),
+        ("seat_type", "{}")
+    )),
+    "flight": ("查询机票", (
+        ("date", "{}"),
+        ("departure_city", "{}"),
+        ("arrival_city", "到{}"),
+        ("cabin_type", "{}")
+    )),
+    "concert": ("查询演唱会", (
+        ("artist", "{}"),
+        ("city", "{}")
+    )),
+}
+
+
 # ==================== Agent卡片定义 ====================
 agent_card = AgentCard(
     name="OrderBookingAgent",
@@ -138,47 +322,89 @@ class TicketAgentClient:
 
     def __init__(self, agent_url: str):
         self.agent_url = agent_url
+        # 长连接客户端（懒加载）：跨请求复用TCP连接，省掉每次握手
+        self._client = None
+        # singleflight：同一查询文本的并发请求共享一次后端调用
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # 常量请求头只构造一次
+        self._headers = {"Content-Type": "application/json"}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """获取长连接AsyncClient，首次调用时创建"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=30.0,
+                base_url=self.agent_url,
+                limits=httpx.Limits(
+                    max_keepalive_connections=32,
+                    max_connections=64
+                )
+            )
+        return self._client
+
+    async def aclose(self):
+        """关闭HTTP客户端"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     async def query_tickets(self, query_text: str) -> Dict[str, Any]:
-        """调用票务Agent查询余票"""
+        """调用票务Agent查询余票（相同查询的并发调用合并为一次）"""
+        inflight = self._inflight.get(query_text)
+        if inflight is not None:
+            return await inflight
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[query_text] = future
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                request_data = {
-                    "jsonrpc": "2.0",
-                    "method": "tasks/send",
-                    "params": {
-                        "message": {
-                            "role": "user",
-                            "content": query_text
+            result = await self._query_tickets(query_text)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._inflight.pop(query_text, None)
+
+    async def _query_tickets(self, query_text: str) -> Dict[str, Any]:
+        """实际执行一次余票查询"""
+        try:
+            request_data = {
+                "jsonrpc": "2.0",
+                "method": "tasks/send",
+                "params": {
+                    "message": {
+                        "role": "user",
+                        "content": query_text
+                    }
+                },
+                "id": uuid.uuid4().hex
+            }
+
+            response = await self._get_client().post(
+                "/a2a",
+                content=orjson.dumps(request_data),
+                headers=self._headers
+            )
+
+            if response.status_code == 200:
+                result = orjson.loads(response.content)
+                logger.info(f"票务Agent响应: {result}")
+
+                if "result" in result:
+                    task_result = result["result"]
+                    if isinstance(task_result, dict):
+                        message = task_result.get("message", {})
+                        content = message.get("content", "") if isinstance(message, dict) else str(message)
+                        state = task_result.get("state", "")
+                        return {
+                            "status": "success" if state == "completed" else state,
+                            "content": content
                         }
-                    },
-                    "id": str(uuid.uuid4())
-                }
-
-                response = await client.post(
-                    f"{self.agent_url}/a2a",
-                    json=request_data,
-                    headers={"Content-Type": "application/json"}
-                )
 
-                if response.status_code == 200:
-                    result = response.json()
-                    logger.info(f"票务Agent响应: {result}")
-
-                    if "result" in result:
-                        task_result = result["result"]
-                        if isinstance(task_result, dict):
-                            message = task_result.get("message", {})
-                            content = message.get("content", "") if isinstance(message, dict) else str(message)
-                            state = task_result.get("state", "")
-                            return {
-                                "status": "success" if state == "completed" else state,
-                                "content": content
-                            }
-
-                    return {"status": "error", "message": "无法解析票务Agent响应"}
-                else:
-                    return {"status": "error", "message": f"HTTP错误: {response.status_code}"}
+                return {"status": "error", "message": "无法解析票务Agent响应"}
+            else:
+                return {"status": "error", "message": f"HTTP错误: {response.status_code}"}
 
         except Exception as e:
             logger.error(f"调用票务Agent失败: {e}")
@@ -191,35 +417,235 @@ class OrderBookingAgent(BaseAgent, MCPClientMixin):
     def __init__(self):
         super().__init__(agent_card=agent_card)
         self.intent_prompt = INTENT_PROMPT
+        # 意图解析专用LLM：确定性采样、限制解码长度、强制JSON输出
+        # （解析结果是固定结构的小JSON，不需要长输出和随机性）
+        self.intent_llm = ChatOpenAI(
+            model=config.llm.model_name,
+            base_url=config.llm.base_url,
+            api_key=config.llm.api_key,
+            temperature=0,
+            max_tokens=256,
+            model_kwargs={"response_format": {"type": "json_object"}}
+        )
+        # 组合一次Runnable链，避免每次解析重建
+        self._intent_chain = self.intent_prompt | self.intent_llm
         self.ticket_client = TicketAgentClient(config.agents.ticket_url)
         self.order_mcp_url = config.mcp.order_url
+        # 精确匹配LRU：重发的相同输入一次哈希探测即命中。
+        # 意图解析只用精确缓存：数量、日期、座位等级、手机号等
+        # 一字之差就是另一笔订单，近似匹配会拿错缓存结果
+        self._intent_exact_cache: OrderedDict = OrderedDict()
+        self._intent_exact_cache_maxsize = 2048
+        # 微批处理器：并发到达的解析请求在15ms窗口内合并为一次LLM调用，
+        # 按预期输出长度分桶，短解析不陪长解析等解码
+        self._intent_batcher = IntentBatcher(
+            self._parse_intent_batch,
+            classify=self._intent_length_bucket
+        )
         logger.info("OrderBookingAgent 初始化完成")
 
+    @staticmethod
+    def _intent_length_bucket(user_input: str) -> str:
+        """
+        预估解析输出的长度级别
+
+        带票务ID的输入解析结果最短；信息齐全的订票描述输出完整的
+        query_params最长；其余多半是input_required追问，居中
+        """
+        if TICKET_ID_RE.search(user_input):
+            return "short"
+        if PHONE_RE.search(user_input) and TICKET_TYPE_RE.search(user_input):
+            return "long"
+        return "medium"
+
     def get_welcome_message(self) -> str:
         return "请输入您的订票需求，例如：订一张明天北京到上海的高铁票，二等座，张三，13800138000"
 
-    def parse_intent(self, user_input: str) -> Dict[str, Any]:
-        """解析用户订票意图"""
+    def _fast_parse(self, user_input: str) -> Optional[Dict[str, Any]]:
+        """
+        确定性快速解析
+
+        票务ID、票类型、联系人、电话齐备的输入不需要LLM，
+        用预编译正则在微秒级完成解析；其余情况返回None走LLM通道
+        """
+        ticket_id_match = TICKET_ID_RE.search(user_input)
+        phone_match = PHONE_RE.search(user_input)
+        type_match = TICKET_TYPE_RE.search(user_input)
+        name_match = NAME_RE.search(user_input)
+
+        if not (ticket_id_match and phone_match and type_match and name_match):
+            return None
+
+        qty_match = QTY_RE.search(user_input)
+        id_card_match = ID_CARD_RE.search(user_input)
+
+        return {
+            "status": "ready",
+            "ticket_type": TICKET_TYPE_MAP[type_match.group()],
+            "query_params": {},
+            "ticket_id": int(ticket_id_match.group(1)),
+            "quantity": int(qty_match.group(1)) if qty_match else 1,
+            "contact": {
+                "name": name_match.group(1),
+                "phone": phone_match.group(),
+                "id_card": id_card_match.group() if id_card_match else ""
+            }
+        }
+
+    def _fast_parse_route(self, user_input: str) -> Optional[Dict[str, Any]]:
+        """
+        路线型快速解析
+
+        城市对、日期词、票类型、联系人齐备的火车/机票输入
+        直接构造意图，跳过LLM；其余情况返回None走LLM通道
+        """
+        type_match = TICKET_TYPE_RE.search(user_input)
+        phone_match = PHONE_RE.search(user_input)
+        name_match = NAME_RE.search(user_input)
+        route_match = ROUTE_RE.search(user_input)
+        date_match = DATE_WORD_RE.search(user_input)
+
+        if not (type_match and phone_match and name_match
+                and route_match and date_match):
+            return None
+
+        ticket_type = TICKET_TYPE_MAP[type_match.group()]
+        if ticket_type == "concert":
+            # 演唱会没有城市对语义，交给LLM
+            return None
+
+        date_text = date_match.group()
+        offset = DATE_OFFSETS.get(date_text)
+        if offset is not None:
+            base = datetime.strptime(self.current_date, '%Y-%m-%d')
+            date_text = (base + timedelta(days=offset)).strftime('%Y-%m-%d')
+
+        query_params = {
+            "departure_city": route_match.group(1),
+            "arrival_city": route_match.group(2),
+            "date": date_text
+        }
+        seat_match = SEAT_RE.search(user_input)
+        if seat_match:
+            seat_key = "seat_type" if ticket_type == "train" else "cabin_type"
+            query_params[seat_key] = seat_match.group()
+
+        qty_match = QTY_RE.search(user_input)
+        id_card_match = ID_CARD_RE.search(user_input)
+
+        return {
+            "status": "ready",
+            "ticket_type": ticket_type,
+            "query_params": query_params,
+            "ticket_id": None,
+            "quantity": int(qty_match.group(1)) if qty_match else 1,
+            "contact": {
+                "name": name_match.group(1),
+                "phone": phone_match.group(),
+                "id_card": id_card_match.group() if id_card_match else ""
+            }
+        }
+
+    async def _parse_intent_batch(self, inputs: List[str]) -> List[Dict[str, Any]]:
+        """
+        批量解析意图
+
+        单条直接走parse_intent（含缓存和快速通道）；
+        多条先过快速通道，剩余的合并为一次LLM调用
+        """
+        if len(inputs) == 1:
+            return [await self.parse_intent(inputs[0])]
+
+        results: List[Optional[Dict[str, Any]]] = [
+            self._fast_parse(text) or self._fast_parse_route(text)
+            for text in inputs
+        ]
+        pending = [i for i, result in enumerate(results) if result is None]
+        if not pending:
+            return results
+
+        numbered_inputs = '\n'.join(
+            f"{n + 1}. {inputs[i]}" for n, i in enumerate(pending)
+        )
+
+        parsed = None
         try:
-            chain = self.intent_prompt | self.llm
-            current_date = self.get_current_date()
+            # 批量输出会超过intent_llm的256 token上限，走通用llm
+            output = (await (BATCH_INTENT_PROMPT | self.llm).ainvoke({
+                "current_date": self.current_date,
+                "numbered_inputs": numbered_inputs
+            })).content.strip()
+
+            fence_match = FENCE_RE.search(output)
+            if fence_match:
+                output = fence_match.group(1)
+
+            batch_result = orjson.loads(output)
+            if isinstance(batch_result, dict):
+                parsed = batch_result.get("results")
+        except Exception as e:
+            logger.error(f"批量意图解析失败，退回逐条解析: {e}")
+
+        if parsed is None or len(parsed) != len(pending):
+            for i in pending:
+                results[i] = await self.parse_intent(inputs[i])
+        else:
+            for n, i in enumerate(pending):
+                results[i] = parsed[n]
+
+        return results
 
-            output = chain.invoke({
+    async def parse_intent(self, user_input: str) -> Dict[str, Any]:
+        """解析用户订票意图"""
+        try:
+            # 快速通道：无歧义的结构化输入直接解析
+            fast_intent = self._fast_parse(user_input) or self._fast_parse_route(user_input)
+            if fast_intent is not None:
+                logger.info(f"意图快速解析命中: {fast_intent}")
+                return fast_intent
+
+            current_date = self.current_date
+
+            # 精确匹配缓存，复制粘贴/重试的相同输入直接返回
+            exact_key = (current_date, re.sub(r"\s+", " ", user_input.strip().lower()))
+            cached = self._intent_exact_cache.get(exact_key)
+            if cached is not None:
+                self._intent_exact_cache.move_to_end(exact_key)
+                logger.info("意图解析命中精确缓存")
+                return cached
+
+            # 流式接收：JSON对象一旦闭合立即停止，不等模型继续生成
+            buf = []
+            async for chunk in self._intent_chain.astream({
                 "current_date": current_date,
                 "user_input": user_input
-            }).content.strip()
+            }):
+                piece = chunk.content
+                if piece:
+                    buf.append(piece)
+                    if '}' in piece and _looks_complete_json(''.join(buf)):
+                        break
+            output = ''.join(buf).strip()
 
             logger.info(f"意图解析输出: {output}")
 
             # 清理markdown代码块
-            if "```json" in output:
-                output = output.split("```json")[1].split("```")[0]
-            elif "```" in output:
-                output = output.split("```")[1].split("```")[0]
+            fence_match = FENCE_RE.search(output)
+            if fence_match:
+                output = fence_match.group(1)
+
+            intent = orjson.loads(output.strip())
+
+            # 只缓存可直接下单的结果，避免追问类输出污染缓存
+            if intent.get("status") == "ready":
+                self._intent_exact_cache[exact_key] = intent
+                self._intent_exact_cache.move_to_end(exact_key)
+                while len(self._intent_exact_cache) > self._intent_exact_cache_maxsize:
+                    self._intent_exact_cache.popitem(last=False)
 
-            return json.loads(output.strip())
+            return intent
 
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"JSON解析失败: {e}")
             return {
                 "status": "input_required",
@@ -234,48 +660,20 @@ class OrderBookingAgent(BaseAgent, MCPClientMixin):
 
     def build_query_text(self, intent: Dict[str, Any]) -> str:
         """根据意图构建票务查询文本"""
-        ticket_type = intent.get("ticket_type", "")
-        params = intent.get("query_params", {})
-
-        if ticket_type == "train":
-            parts = ["查询火车票"]
-            if params.get("date"):
-                parts.append(params["date"])
-            if params.get("departure_city"):
-                parts.append(params["departure_city"])
-            if params.get("arrival_city"):
-                parts.append(f"到{params['arrival_city']}")
-            if params.get("seat_type"):
-                parts.append(params["seat_type"])
-            return ' '.join(parts)
-
-        elif ticket_type == "flight":
-            parts = ["查询机票"]
-            if params.get("date"):
-                parts.append(params["date"])
-            if params.get("departure_city"):
-                parts.append(params["departure_city"])
-            if params.get("arrival_city"):
-                parts.append(f"到{params['arrival_city']}")
-            if params.get("cabin_type"):
-                parts.append(params["cabin_type"])
-            return ' '.join(parts)
-
-        elif ticket_type == "concert":
-            parts = ["查询演唱会"]
-            if params.get("artist"):
-                parts.append(params["artist"])
-            if params.get("city"):
-                parts.append(params["city"])
-            return ' '.join(parts)
-
-        return "查询票务"
+        head, spec = QUERY_SPECS.get(intent.get("ticket_type", ""), ("查询票务", ()))
+        params = intent.get("query_params", {}) or {}
+
+        parts = [head]
+        parts.extend(
+            fmt.format(value)
+            for key, fmt in spec
+            if (value := params.get(key))
+        )
+        return ' '.join(parts)
 
     def extract_ticket_ids(self, content: str) -> List[int]:
         """从票务Agent响应中提取票务ID列表"""
-        pattern = r'票务ID[：:]\s*(\d+)'
-        matches = re.findall(pattern, content)
-        return [int(tid) for tid in matches]
+        return [int(tid) for tid in TICKET_ID_RE.findall(content)]
 
     def format_booking_result(self, result: Dict[str, Any]) -> str:
         """格式化订票结果"""
@@ -283,7 +681,7 @@ class OrderBookingAgent(BaseAgent, MCPClientMixin):
             data = result.get("data", {})
             if isinstance(data, str):
                 try:
-                    data = json.loads(data)
+                    data = orjson.loads(data)
                 except:
                     return f"✅ 订票成功！\n{data}"
 
@@ -298,8 +696,55 @@ class OrderBookingAgent(BaseAgent, MCPClientMixin):
         else:
             return f"❌ 订票失败: {result.get('message', '未知错误')}"
 
-    async def handle_task(self, task) -> TaskStatus:
-        """处理订票任务"""
+    async def _place_order(
+        self,
+        intent: Dict[str, Any],
+        contact: Dict[str, Any],
+        ticket_id: int
+    ) -> TaskStatus:
+        """下单并格式化结果，两条成功路径共用"""
+        order_data = {
+            "ticket_type": intent.get("ticket_type", "train"),
+            "ticket_id": ticket_id,
+            "quantity": intent.get("quantity", 1),
+            "contact_name": contact.get("name", ""),
+            "contact_phone": contact.get("phone", ""),
+            "contact_id_card": contact.get("id_card", "")
+        }
+
+        order_result = await self.call_mcp_tool(
+            self.order_mcp_url,
+            "create_order",
+            order_data
+        )
+        formatted = self.format_booking_result(order_result)
+
+        if order_result.get("status") == "success":
+            return self.create_success_response(formatted)
+        return self.create_error_response(formatted)
+
+    async def _warmup_mcp_session(self):
+        """预热订单MCP会话；失败只记日志，下单时会懒重连"""
+        try:
+            await self._ensure_mcp_session(self.order_mcp_url)
+        except Exception as e:
+            logger.debug(f"MCP会话预热失败: {e}")
+
+    async def _shutdown_async(self):
+        """除MCP会话池外，还关闭票务Agent的HTTP连接池"""
+        await super()._shutdown_async()
+        await self.ticket_client.aclose()
+
+    async def process_task(self, task) -> TaskStatus:
+        """处理订票任务（整体20秒预算，约束尾延迟）"""
+        try:
+            return await asyncio.wait_for(self._handle_task_inner(task), timeout=20.0)
+        except asyncio.TimeoutError:
+            logger.error("处理订票任务超时")
+            return self.create_error_response("请求超时，请稍后重试")
+
+    async def _handle_task_inner(self, task) -> TaskStatus:
+        """订票任务主流程"""
         try:
             # 1. 提取用户输入
             user_input = self.extract_user_input(task)
@@ -309,8 +754,11 @@ class OrderBookingAgent(BaseAgent, MCPClientMixin):
 
             logger.info(f"收到订票请求: {user_input}")
 
-            # 2. 解析意图
-            intent = self.parse_intent(user_input)
+            # 预热订单MCP会话，与意图解析并行，省掉下单时的initialize往返
+            warmup = asyncio.create_task(self._warmup_mcp_session())
+
+            # 2. 解析意图（并发任务经微批处理器合并LLM调用）
+            intent = await self._intent_batcher.parse(user_input)
             logger.info(f"解析意图: {intent}")
 
             # 3. 检查是否需要补充信息
@@ -319,9 +767,10 @@ class OrderBookingAgent(BaseAgent, MCPClientMixin):
                     intent.get("message", "请提供更多订票信息")
                 )
 
-            # 4. 检查联系人信息
-            contact = intent.get("contact", {})
-            if not contact.get("name") or not contact.get("phone"):
+            # 4. 检查联系人信息（一次取值，短路判断）
+            contact = intent.get("contact") or {}
+            name, phone = contact.get("name"), contact.get("phone")
+            if not (name and phone):
                 return self.create_input_required_response(
                     "请提供联系人姓名和手机号码，例如：张三，13800138000"
                 )
@@ -330,27 +779,8 @@ class OrderBookingAgent(BaseAgent, MCPClientMixin):
             ticket_id = intent.get("ticket_id")
             if ticket_id:
                 logger.info(f"使用指定票务ID下单: {ticket_id}")
-
-                order_data = {
-                    "ticket_type": intent.get("ticket_type", "train"),
-                    "ticket_id": ticket_id,
-                    "quantity": intent.get("quantity", 1),
-                    "contact_name": contact.get("name", ""),
-                    "contact_phone": contact.get("phone", ""),
-                    "contact_id_card": contact.get("id_card", "")
-                }
-
-                order_result = await self.call_mcp_tool(
-                    self.order_mcp_url,
-                    "create_order",
-                    order_data
-                )
-                formatted = self.format_booking_result(order_result)
-
-                if order_result.get("status") == "success":
-                    return self.create_success_response(formatted)
-                else:
-                    return self.create_error_response(formatted)
+                await warmup
+                return await self._place_order(intent, contact, ticket_id)
 
             # 6. 调用票务Agent查询余票
             query_text = self.build_query_text(intent)
@@ -359,6 +789,8 @@ class OrderBookingAgent(BaseAgent, MCPClientMixin):
             ticket_result = await self.ticket_client.query_tickets(query_text)
             logger.info(f"余票查询结果: {ticket_result}")
 
+            await warmup
+
             if ticket_result.get("status") == "error":
                 return self.create_error_response(
                     f"查询余票失败: {ticket_result.get('message')}"
@@ -367,7 +799,7 @@ class OrderBookingAgent(BaseAgent, MCPClientMixin):
             # 7. 检查余票
             content = ticket_result.get("content", "")
 
-            if "未找到" in content or "没有" in content:
+            if NO_TICKET_RE.search(content):
                 return self.create_input_required_response(
                     f"😔 {content}\n\n请调整您的出行计划：\n- 尝试其他日期\n- 尝试其他座位类型\n- 尝试其他车次/航班"
                 )
@@ -382,26 +814,7 @@ class OrderBookingAgent(BaseAgent, MCPClientMixin):
 
             # 9. 如果只有一个选择，自动下单
             if len(ticket_ids) == 1:
-                order_data = {
-                    "ticket_type": intent.get("ticket_type", "train"),
-                    "ticket_id": ticket_ids[0],
-                    "quantity": intent.get("quantity", 1),
-                    "contact_name": contact.get("name", ""),
-                    "contact_phone": contact.get("phone", ""),
-                    "contact_id_card": contact.get("id_card", "")
-                }
-
-                order_result = await self.call_mcp_tool(
-                    self.order_mcp_url,
-                    "create_order",
-                    order_data
-                )
-                formatted = self.format_booking_result(order_result)
-
-                if order_result.get("status") == "success":
-                    return self.create_success_response(formatted)
-                else:
-                    return self.create_error_response(formatted)
+                return await self._place_order(intent, contact, ticket_ids[0])
             else:
                 # 多个选择，让用户指定
                 return self.create_input_required_response(
@@ -431,6 +844,15 @@ def main():
     print("  🎤 订周杰伦北京演唱会内场票，王五，13700137000")
     print("=" * 60)
 
+    # 可选加速：uvloop事件循环（Linux/macOS，未安装时静默跳过）
+    if sys.platform != "win32":
+        try:
+            import uvloop
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+            logger.info("已启用uvloop事件循环")
+        except ImportError:
+            pass
+
     server = OrderBookingAgent()
 
     try:
@@ -440,6 +862,9 @@ def main():
     except Exception as e:
         logger.error(f"服务器启动失败: {e}")
         raise
+    finally:
+        # 排空MCP会话池、关闭HTTP客户端并停掉常驻循环
+        server.shutdown()
 
 
 if __name__ == "__main__":
@@ -6,14 +6,19 @@ src/agents/ticket_agent.py
 处理火车票、机票、演唱会票的自然语言查询
 """
 
-import json
+import asyncio
+import hashlib
+from collections import OrderedDict, defaultdict
 from typing import Dict, Any
 
+import orjson
+
 from python_a2a import AgentCard, AgentSkill, TaskStatus, TaskState, run_server
 from langchain_core.prompts import ChatPromptTemplate
 
 from src.config import config, logger
 from src.agents.base_agent import BaseAgent, MCPClientMixin
+from src.utils.cache import SemanticCache
 
 
 # 数据表Schema定义
@@ -58,19 +63,13 @@ CREATE TABLE concert_tickets (
 );
 """
 
-# SQL生成Prompt
-SQL_PROMPT = ChatPromptTemplate.from_template("""
-你是一个专业的票务SQL生成器。根据用户的自然语言查询，生成对应的SQL语句。
+# SQL生成Prompt：表结构、规则和示例集中在system消息并保持逐字节稳定，
+# 动态内容只留日期和查询，让服务端的前缀缓存能命中静态段
+SQL_SYSTEM_PROMPT = """你是一个专业的票务SQL生成器。根据用户的自然语言查询，生成对应的SQL语句。
 
 【数据表结构】
 {table_schema}
 
-【当前日期】
-{current_date}
-
-【用户查询】
-{user_query}
-
 【生成规则】
 1. 识别查询类型：
    - 火车票/高铁票 → train_tickets 表
@@ -97,12 +96,67 @@ SQL_PROMPT = ChatPromptTemplate.from_template("""
 如果信息不足，输出：
 {{"status": "input_required", "message": "需要补充的信息"}}
 
+如果查询有歧义、可能对应多种票型（如"去北京的票"），在一行内输出：
+{{"status": "sqls", "queries": [{{"type": "train", "sql": "SELECT..."}}, {{"type": "flight", "sql": "SELECT..."}}]}}
+
 【示例】
-用户：明天北京到上海的高铁票
+用户（当前日期2026-01-18）：明天北京到上海的高铁票
 输出：
 {{"type": "train"}}
 SELECT id, departure_city, arrival_city, departure_time, arrival_time, train_number, seat_type, price, remaining_seats FROM train_tickets WHERE departure_city = '北京' AND arrival_city = '上海' AND DATE(departure_time) = '2026-01-19' AND remaining_seats > 0 ORDER BY departure_time LIMIT 10
-""")
+"""
+
+SQL_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", SQL_SYSTEM_PROMPT),
+    ("user", "【当前日期】{current_date}\n【用户查询】{user_query}")
+])
+
+
+# 结果格式化模板：按票类型给出标题模板和单条记录的格式串，
+# 单条记录用一次format_map在C层完成所有字段取值，
+# 替代每条记录若干次dict.get加f-string拼接；缺失字段渲染为空串
+FORMATTERS = {
+    "train": (
+        "🚄 找到 {} 条火车票信息：\n",
+        "【{i}】{train_number} {seat_type}\n"
+        "    {departure_city} → {arrival_city}\n"
+        "    出发: {departure_time}\n"
+        "    到达: {arrival_time}\n"
+        "    💰 ¥{price} | 余票: {remaining_seats}张\n"
+        "    🎫 票务ID: {id}\n"
+    ),
+    "flight": (
+        "✈️ 找到 {} 条机票信息：\n",
+        "【{i}】{flight_number} {cabin_type}\n"
+        "    {departure_city} → {arrival_city}\n"
+        "    出发: {departure_time}\n"
+        "    到达: {arrival_time}\n"
+        "    💰 ¥{price} | 余票: {remaining_seats}张\n"
+        "    🎫 票务ID: {id}\n"
+    ),
+    "concert": (
+        "🎤 找到 {} 条演唱会信息：\n",
+        "【{i}】{artist} - {ticket_type}\n"
+        "    📍 {city} · {venue}\n"
+        "    🕐 {start_time}\n"
+        "    💰 ¥{price} | 余票: {remaining_seats}张\n"
+        "    🎫 票务ID: {id}\n"
+    ),
+}
+
+
+# SQL生成结果缓存：同一天内重复的查询文本直接复用已生成的SQL，
+# 省掉一次LLM调用；只缓存成功生成SQL的结果
+_sql_cache: OrderedDict = OrderedDict()
+_SQL_CACHE_MAXSIZE = 1024
+
+
+def _store_sql_cache(key: str, result: Dict[str, Any]) -> None:
+    """写入SQL缓存并按LRU淘汰"""
+    _sql_cache[key] = result
+    _sql_cache.move_to_end(key)
+    while len(_sql_cache) > _SQL_CACHE_MAXSIZE:
+        _sql_cache.popitem(last=False)
 
 
 # Agent卡片定义
@@ -141,34 +195,62 @@ class TicketQueryAgent(BaseAgent, MCPClientMixin):
     def __init__(self):
         super().__init__(agent_card=TICKET_AGENT_CARD)
         self.sql_prompt = SQL_PROMPT
+        # 组合一次Runnable链并预绑定不变的表结构，
+        # 每次调用只需填充日期和用户查询
+        self.sql_chain = self.sql_prompt.partial(table_schema=TABLE_SCHEMA) | self.llm
         self.mcp_url = config.mcp.ticket_url
+        # 语义缓存：措辞不同但实体一致的查询（如"查询明天北京到上海的
+        # 高铁票"与"明天北京到上海的高铁"）复用已生成的SQL；按日期隔离
+        # 命名空间，数字/日期/城市等实体不同的查询不会互相命中
+        self._semantic_sql_cache = SemanticCache(maxsize=256, threshold=0.93)
     
     def get_welcome_message(self) -> str:
         return "请输入您的票务查询需求，例如：查询明天北京到上海的高铁票"
     
-    def generate_sql(self, user_query: str) -> Dict[str, Any]:
+    async def _warmup_mcp_session(self):
+        """预热MCP会话，失败不影响主流程（调用时会懒重连）"""
+        try:
+            await self._ensure_mcp_session(self.mcp_url)
+        except Exception as e:
+            logger.debug(f"MCP会话预热失败: {e}")
+
+    async def agenerate_sql(self, user_query: str) -> Dict[str, Any]:
         """
-        使用LLM生成SQL
-        
+        使用LLM生成SQL（异步，不阻塞事件循环）
+
         Args:
             user_query: 用户查询文本
-            
+
         Returns:
             包含type和sql的字典，或追问信息
         """
         try:
-            chain = self.sql_prompt | self.llm
-            
-            output = chain.invoke({
-                "table_schema": TABLE_SCHEMA,
-                "current_date": self.current_date,
+            current_date = self.current_date
+            norm_query = user_query.strip().lower()
+            cache_key = hashlib.sha256(
+                f"{current_date}|{norm_query}".encode()
+            ).hexdigest()
+
+            cached = _sql_cache.get(cache_key)
+            if cached is not None:
+                _sql_cache.move_to_end(cache_key)
+                logger.info("SQL生成命中缓存")
+                return cached
+
+            semantic = self._semantic_sql_cache.get(norm_query, namespace=current_date)
+            if semantic is not None:
+                logger.info("SQL生成命中语义缓存")
+                return semantic
+
+            output = (await self.sql_chain.ainvoke({
+                "current_date": current_date,
                 "user_query": user_query
-            }).content.strip()
+            })).content.strip()
             
             logger.info(f"LLM输出: {output}")
             
-            # 清理markdown代码块
-            if "```" in output:
+            # 清理markdown代码块（无围栏的常见情况整块跳过）
+            if output.startswith('```'):
                 lines = []
                 in_code = False
                 for line in output.split('\n'):
@@ -178,28 +260,36 @@ class TicketQueryAgent(BaseAgent, MCPClientMixin):
                     if not in_code or line.strip():
                         lines.append(line)
                 output = '\n'.join(lines).strip()
-            
-            # 解析输出
-            lines = output.strip().split('\n')
-            first_line = lines[0].strip()
-            
-            # 检查是否是追问
-            if first_line.startswith('{"status"'):
-                return json.loads(first_line)
-            
-            # 解析类型和SQL
-            if first_line.startswith('{"type"'):
-                query_type = json.loads(first_line).get("type")
-                sql = ' '.join(line.strip() for line in lines[1:] if line.strip())
-                return {"status": "sql", "type": query_type, "sql": sql}
-            
+
+            # 解析输出：只切出首行，解析一次JSON做分类
+            nl = output.find('\n')
+            first_line = (output[:nl] if nl >= 0 else output).strip()
+
+            if first_line.startswith('{'):
+                head = orjson.loads(first_line)
+
+                # 追问
+                if "status" in head:
+                    return head
+
+                # 类型头 + SQL正文
+                if "type" in head:
+                    sql = ' '.join(output[nl + 1:].split()) if nl >= 0 else ""
+                    result = {"status": "sql", "type": head.get("type"), "sql": sql}
+                    _store_sql_cache(cache_key, result)
+                    self._semantic_sql_cache.put(norm_query, result, namespace=current_date)
+                    return result
+
             # 尝试直接作为SQL
             if "SELECT" in output.upper():
-                return {"status": "sql", "type": "unknown", "sql": output}
+                result = {"status": "sql", "type": "unknown", "sql": output}
+                _store_sql_cache(cache_key, result)
+                self._semantic_sql_cache.put(norm_query, result, namespace=current_date)
+                return result
             
             return {"status": "input_required", "message": "无法理解您的查询，请提供更多信息。"}
             
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"JSON解析失败: {e}")
             return {"status": "input_required", "message": "解析失败，请重新描述您的需求。"}
         except Exception as e:
@@ -218,7 +308,7 @@ class TicketQueryAgent(BaseAgent, MCPClientMixin):
             格式化后的文本
         """
         try:
-            records = json.loads(data) if isinstance(data, str) else data
+            records = orjson.loads(data) if isinstance(data, (str, bytes)) else data
             
             if not records:
                 return "😔 未找到符合条件的票务信息，请尝试调整查询条件。"
@@ -231,52 +321,26 @@ class TicketQueryAgent(BaseAgent, MCPClientMixin):
             if not records:
                 return "😔 未找到符合条件的票务信息。"
             
-            lines = []
-            
-            if query_type == "train":
-                lines.append(f"🚄 找到 {len(records)} 条火车票信息：\n")
-                for i, t in enumerate(records, 1):
-                    lines.append(f"【{i}】{t.get('train_number', '')} {t.get('seat_type', '')}")
-                    lines.append(f"    {t.get('departure_city', '')} → {t.get('arrival_city', '')}")
-                    lines.append(f"    出发: {t.get('departure_time', '')}")
-                    lines.append(f"    到达: {t.get('arrival_time', '')}")
-                    lines.append(f"    💰 ¥{t.get('price', '')} | 余票: {t.get('remaining_seats', '')}张")
-                    lines.append(f"    🎫 票务ID: {t.get('id', '')}")
-                    lines.append("")
-                    
-            elif query_type == "flight":
-                lines.append(f"✈️ 找到 {len(records)} 条机票信息：\n")
-                for i, t in enumerate(records, 1):
-                    lines.append(f"【{i}】{t.get('flight_number', '')} {t.get('cabin_type', '')}")
-                    lines.append(f"    {t.get('departure_city', '')} → {t.get('arrival_city', '')}")
-                    lines.append(f"    出发: {t.get('departure_time', '')}")
-                    lines.append(f"    到达: {t.get('arrival_time', '')}")
-                    lines.append(f"    💰 ¥{t.get('price', '')} | 余票: {t.get('remaining_seats', '')}张")
-                    lines.append(f"    🎫 票务ID: {t.get('id', '')}")
-                    lines.append("")
-                    
-            elif query_type == "concert":
-                lines.append(f"🎤 找到 {len(records)} 条演唱会信息：\n")
-                for i, t in enumerate(records, 1):
-                    lines.append(f"【{i}】{t.get('artist', '')} - {t.get('ticket_type', '')}")
-                    lines.append(f"    📍 {t.get('city', '')} · {t.get('venue', '')}")
-                    lines.append(f"    🕐 {t.get('start_time', '')}")
-                    lines.append(f"    💰 ¥{t.get('price', '')} | 余票: {t.get('remaining_seats', '')}张")
-                    lines.append(f"    🎫 票务ID: {t.get('id', '')}")
-                    lines.append("")
-            else:
+            formatter = FORMATTERS.get(query_type)
+            if formatter is None:
                 return f"查询结果: {data}"
+
+            header_tmpl, row_tmpl = formatter
+            parts = [header_tmpl.format(len(records))]
+            parts.extend(
+                row_tmpl.format_map(defaultdict(str, t, i=i))
+                for i, t in enumerate(records, 1)
+            )
+            parts.append("💡 如需订票，请提供票务ID和联系人信息")
+            return '\n'.join(parts)
             
-            lines.append("💡 如需订票，请提供票务ID和联系人信息")
-            return '\n'.join(lines)
-            
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             return f"查询结果: {data}"
         except Exception as e:
             logger.error(f"格式化结果失败: {e}")
             return f"查询结果: {data}"
     
-    async def handle_task(self, task) -> TaskStatus:
+    async def process_task(self, task) -> TaskStatus:
         """处理查询任务"""
         try:
             # 提取用户输入
@@ -286,17 +350,41 @@ class TicketQueryAgent(BaseAgent, MCPClientMixin):
                 return self.input_required_response(self.get_welcome_message())
             
             logger.info(f"收到票务查询: {user_input}")
-            
-            # 生成SQL
-            sql_result = self.generate_sql(user_input)
+
+            # 生成SQL，同时预热MCP会话：TCP/initialize握手与LLM延迟重叠
+            warmup = asyncio.create_task(self._warmup_mcp_session())
+            sql_result = await self.agenerate_sql(user_input)
             logger.info(f"SQL生成结果: {sql_result}")
-            
+
             # 处理追问
             if sql_result.get("status") == "input_required":
                 return self.input_required_response(
                     sql_result.get("message", "请提供更多信息")
                 )
-            
+
+            await warmup
+
+            # 歧义查询：多条SQL经持久MCP会话并发执行，结果拼接返回
+            if sql_result.get("status") == "sqls":
+                queries = sql_result.get("queries", [])
+                mcp_results = await asyncio.gather(*(
+                    self.call_mcp_tool(
+                        self.mcp_url,
+                        "query_tickets",
+                        {"sql": q.get("sql", "")}
+                    )
+                    for q in queries
+                ))
+
+                sections = [
+                    self.format_results(q.get("type", "unknown"), r.get("data", ""))
+                    for q, r in zip(queries, mcp_results)
+                    if r.get("status") != "error"
+                ]
+                if not sections:
+                    return self.error_response("查询失败，请稍后重试。")
+                return self.success_response('\n\n'.join(sections))
+
             # 执行查询
             if sql_result.get("status") == "sql":
                 query_type = sql_result.get("type", "unknown")
@@ -346,6 +434,9 @@ def main():
     except Exception as e:
         logger.error(f"服务器启动失败: {e}")
         raise
+    finally:
+        # 排空MCP会话池并停掉常驻循环
+        agent.shutdown()
 
 
 if __name__ == "__main__":
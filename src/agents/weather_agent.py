@@ -6,20 +6,27 @@ src/agents/weather_agent.py
 处理天气查询请求，调用天气MCP服务获取数据
 """
 
-import json
+import asyncio
+import hashlib
+import re
+from collections import OrderedDict
 from datetime import datetime
 from typing import Dict, Any
 
+import orjson
+
 from python_a2a import AgentCard, AgentSkill, TaskStatus, TaskState
 from langchain_core.prompts import ChatPromptTemplate
 
 from src.agents.base_agent import BaseAgent, MCPClientMixin
 from src.config import config, logger
+from src.utils.cache import SemanticCache
 
 
 # ==================== SQL生成提示词 ====================
-SQL_PROMPT = ChatPromptTemplate.from_template(
-    """
+# 静态内容（表结构、规则、示例）全部放进system消息，
+# 每次请求只有user消息变化，便于服务端复用提示词前缀缓存
+SQL_SYSTEM_PROMPT = """
 你是一个专业的天气查询SQL生成器。根据用户的自然语言查询，生成对应的SQL语句。
 
 【数据表结构】
@@ -41,12 +48,6 @@ CREATE TABLE weather_data (
     vis INT COMMENT '能见度'
 );
 
-【当前日期】
-{current_date}
-
-【用户查询】
-{user_query}
-
 【生成规则】
 1. 支持的城市：北京、上海、广州、深圳
 2. 如果用户说"今天"，使用当前日期
@@ -61,15 +62,69 @@ CREATE TABLE weather_data (
 如果信息不足，输出：
 {{"status": "input_required", "message": "具体需要补充的信息"}}
 
-【示例】
+【示例】（假设当前日期为2026-01-18）
 用户：北京明天天气
 输出：SELECT city, fx_date, temp_max, temp_min, text_day, text_night, humidity, wind_dir_day, wind_scale_day, precip, uv_index FROM weather_data WHERE city = '北京' AND fx_date = '2026-01-19'
 
 用户：天气
 输出：{{"status": "input_required", "message": "请告诉我您想查询哪个城市的天气？目前支持：北京、上海、广州、深圳"}}
 """
+
+SQL_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", SQL_SYSTEM_PROMPT),
+    ("user", "【当前日期】{current_date}\n【用户查询】{user_query}")
+])
+
+
+# markdown代码围栏：单次匹配取出围栏内内容，替代逐行扫描拼接
+_FENCE_RE = re.compile(r"```(?:\w+)?\s*(.*?)\s*```", re.S)
+
+# 天气描述 -> 图标映射，配合alternation正则一次扫描完成匹配；
+# 长词在前，保证"雷阵雨"等复合描述优先于其中的单字命中
+_WEATHER_ICONS = {
+    '晴': '☀️',
+    '多云': '⛅',
+    '阴': '☁️',
+    '小雨': '🌦️',
+    '中雨': '🌧️',
+    '大雨': '🌧️',
+    '暴雨': '⛈️',
+    '雷阵雨': '⛈️',
+    '小雪': '🌨️',
+    '中雪': '❄️',
+    '大雪': '❄️',
+    '雾': '🌫️',
+    '霾': '😷',
+}
+_ICON_RE = re.compile("|".join(
+    map(re.escape, sorted(_WEATHER_ICONS, key=len, reverse=True))
+))
+
+# 单条预报记录的渲染模板：一次format完成整条记录，
+# 降水行在有降水时才拼入（{precip_line}自带换行）
+_WEATHER_ROW_TPL = (
+    "📍 {city} - {date}\n"
+    "   {icon} {text_day} / {text_night}\n"
+    "   🌡️ 温度: {temp_min}°C ~ {temp_max}°C\n"
+    "   💧 湿度: {humidity}%\n"
+    "   🌬️ 风向: {wind_dir} {wind_scale}级\n"
+    "{precip_line}"
+    "   ☀️ 紫外线指数: {uv_index}\n"
 )
 
+# SQL生成结果缓存：同一天内重复的查询文本直接复用已生成的SQL，
+# 省掉一次LLM调用；只缓存成功生成SQL的结果
+_sql_cache: OrderedDict = OrderedDict()
+_SQL_CACHE_MAXSIZE = 1024
+
+
+def _store_sql_cache(key: str, result: Dict[str, Any]) -> None:
+    """写入SQL缓存并按LRU淘汰"""
+    _sql_cache[key] = result
+    _sql_cache.move_to_end(key)
+    while len(_sql_cache) > _SQL_CACHE_MAXSIZE:
+        _sql_cache.popitem(last=False)
+
 
 # ==================== Agent卡片定义 ====================
 agent_card = AgentCard(
@@ -102,15 +157,28 @@ class WeatherQueryAgent(BaseAgent, MCPClientMixin):
     def __init__(self):
         super().__init__(agent_card=agent_card)
         self.sql_prompt = SQL_PROMPT
+        # 组合一次Runnable链，避免每次查询重建prompt|llm管道
+        self.sql_chain = self.sql_prompt | self.llm
         self.mcp_url = config.mcp.weather_url
+        # 语义缓存：措辞不同但实体一致的查询（如"查询明天北京天气"与
+        # "明天北京天气怎么样"）复用已生成的SQL；按日期隔离命名空间，
+        # 数字/日期/城市等实体不同的查询不会互相命中
+        self._semantic_sql_cache = SemanticCache(maxsize=256, threshold=0.93)
         logger.info("WeatherQueryAgent 初始化完成")
 
     def get_welcome_message(self) -> str:
         return "请输入您的天气查询需求，例如：北京明天天气怎么样"
 
-    def generate_sql(self, user_query: str) -> Dict[str, Any]:
+    async def _warmup_mcp_session(self):
+        """预热MCP会话，失败不影响主流程（调用时会懒重连）"""
+        try:
+            await self._ensure_mcp_session(self.mcp_url)
+        except Exception as e:
+            logger.debug(f"MCP会话预热失败: {e}")
+
+    async def agenerate_sql(self, user_query: str) -> Dict[str, Any]:
         """
-        使用LLM生成SQL
+        使用LLM生成SQL（异步，不阻塞事件循环）
 
         Args:
             user_query: 用户查询
@@ -119,39 +187,50 @@ class WeatherQueryAgent(BaseAgent, MCPClientMixin):
             包含sql的字典或追问信息
         """
         try:
-            chain = self.sql_prompt | self.llm
-            current_date = self.get_current_date()
+            current_date = self.current_date
+            norm_query = user_query.strip().lower()
+
+            cache_key = hashlib.sha256(
+                f"{current_date}|{norm_query}".encode()
+            ).hexdigest()
+
+            cached = _sql_cache.get(cache_key)
+            if cached is not None:
+                _sql_cache.move_to_end(cache_key)
+                logger.info("SQL生成命中缓存")
+                return cached
+
+            semantic = self._semantic_sql_cache.get(norm_query, namespace=current_date)
+            if semantic is not None:
+                logger.info("SQL生成命中语义缓存")
+                return semantic
 
-            output = chain.invoke({
+            output = (await self.sql_chain.ainvoke({
                 "current_date": current_date,
                 "user_query": user_query
-            }).content.strip()
+            })).content.strip()
 
             logger.info(f"LLM输出: {output}")
 
             # 清理markdown代码块
             if "```" in output:
-                lines = []
-                in_code = False
-                for line in output.split('\n'):
-                    if line.strip().startswith('```'):
-                        in_code = not in_code
-                        continue
-                    if not in_code or line.strip():
-                        lines.append(line)
-                output = '\n'.join(lines).strip()
+                match = _FENCE_RE.search(output)
+                output = match.group(1) if match else output.replace("```", "").strip()
 
             # 检查是否是追问
             if output.startswith('{"status"'):
-                return json.loads(output)
+                return orjson.loads(output)
 
             # 是SQL语句
             if "SELECT" in output.upper():
-                return {"status": "sql", "sql": output}
+                result = {"status": "sql", "sql": output}
+                _store_sql_cache(cache_key, result)
+                self._semantic_sql_cache.put(norm_query, result, namespace=current_date)
+                return result
 
             return {"status": "input_required", "message": "无法理解您的查询，请提供城市和日期信息。"}
 
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"JSON解析失败: {e}")
             return {"status": "input_required", "message": "请重新描述您的天气查询需求。"}
         except Exception as e:
@@ -169,7 +248,7 @@ class WeatherQueryAgent(BaseAgent, MCPClientMixin):
             格式化后的文本
         """
         try:
-            records = json.loads(data) if isinstance(data, str) else data
+            records = orjson.loads(data) if isinstance(data, (str, bytes)) else data
 
             if not records:
                 return "😔 未找到天气数据，请确认城市名称是否正确（支持：北京、上海、广州、深圳）。"
@@ -182,34 +261,28 @@ class WeatherQueryAgent(BaseAgent, MCPClientMixin):
                 else:
                     records = [records]
 
-            lines = []
-            lines.append(f"🌤️ 天气预报查询结果：\n")
+            parts = ["🌤️ 天气预报查询结果：\n"]
 
             for w in records:
-                city = w.get('city', '未知')
-                date = w.get('fx_date', '未知')
-                temp_max = w.get('temp_max', '-')
-                temp_min = w.get('temp_min', '-')
                 text_day = w.get('text_day', '-')
-                text_night = w.get('text_night', '-')
-                humidity = w.get('humidity', '-')
-                wind_dir = w.get('wind_dir_day', '-')
-                wind_scale = w.get('wind_scale_day', '-')
                 precip = w.get('precip', 0)
-                uv_index = w.get('uv_index', '-')
-
-                # 天气图标
-                weather_icon = self._get_weather_icon(text_day)
-
-                lines.append(f"📍 {city} - {date}")
-                lines.append(f"   {weather_icon} {text_day} / {text_night}")
-                lines.append(f"   🌡️ 温度: {temp_min}°C ~ {temp_max}°C")
-                lines.append(f"   💧 湿度: {humidity}%")
-                lines.append(f"   🌬️ 风向: {wind_dir} {wind_scale}级")
-                if float(precip or 0) > 0:
-                    lines.append(f"   🌧️ 降水: {precip}mm")
-                lines.append(f"   ☀️ 紫外线指数: {uv_index}")
-                lines.append("")
+                parts.append(_WEATHER_ROW_TPL.format(
+                    city=w.get('city', '未知'),
+                    date=w.get('fx_date', '未知'),
+                    icon=self._get_weather_icon(text_day),
+                    text_day=text_day,
+                    text_night=w.get('text_night', '-'),
+                    temp_min=w.get('temp_min', '-'),
+                    temp_max=w.get('temp_max', '-'),
+                    humidity=w.get('humidity', '-'),
+                    wind_dir=w.get('wind_dir_day', '-'),
+                    wind_scale=w.get('wind_scale_day', '-'),
+                    precip_line=(
+                        f"   🌧️ 降水: {precip}mm\n"
+                        if float(precip or 0) > 0 else ""
+                    ),
+                    uv_index=w.get('uv_index', '-'),
+                ))
 
             # 添加温馨提示
             if records:
@@ -229,11 +302,11 @@ class WeatherQueryAgent(BaseAgent, MCPClientMixin):
                     tips.append("⛄ 注意路滑")
 
                 if tips:
-                    lines.append("💡 温馨提示: " + "，".join(tips))
+                    parts.append("💡 温馨提示: " + "，".join(tips))
 
-            return '\n'.join(lines)
+            return '\n'.join(parts)
 
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             return f"天气数据: {data}"
         except Exception as e:
             logger.error(f"格式化天气结果失败: {e}")
@@ -241,28 +314,10 @@ class WeatherQueryAgent(BaseAgent, MCPClientMixin):
 
     def _get_weather_icon(self, weather_text: str) -> str:
         """根据天气描述返回对应图标"""
-        weather_icons = {
-            '晴': '☀️',
-            '多云': '⛅',
-            '阴': '☁️',
-            '小雨': '🌦️',
-            '中雨': '🌧️',
-            '大雨': '🌧️',
-            '暴雨': '⛈️',
-            '雷阵雨': '⛈️',
-            '小雪': '🌨️',
-            '中雪': '❄️',
-            '大雪': '❄️',
-            '雾': '🌫️',
-            '霾': '😷',
-        }
-
-        for key, icon in weather_icons.items():
-            if key in (weather_text or ''):
-                return icon
-        return '🌤️'
-
-    async def handle_task(self, task) -> TaskStatus:
+        match = _ICON_RE.search(weather_text or '')
+        return _WEATHER_ICONS[match.group()] if match else '🌤️'
+
+    async def process_task(self, task) -> TaskStatus:
         """处理天气查询任务"""
         try:
             # 1. 提取用户输入
@@ -273,8 +328,9 @@ class WeatherQueryAgent(BaseAgent, MCPClientMixin):
 
             logger.info(f"收到天气查询: {user_input}")
 
-            # 2. 生成SQL
-            sql_result = self.generate_sql(user_input)
+            # 2. 生成SQL，同时预热MCP会话：握手与LLM延迟重叠
+            warmup = asyncio.create_task(self._warmup_mcp_session())
+            sql_result = await self.agenerate_sql(user_input)
             logger.info(f"SQL生成结果: {sql_result}")
 
             # 3. 处理追问
@@ -283,6 +339,8 @@ class WeatherQueryAgent(BaseAgent, MCPClientMixin):
                     sql_result.get("message", "请提供更多信息")
                 )
 
+            await warmup
+
             # 4. 执行查询
             if sql_result.get("status") == "sql":
                 sql = sql_result.get("sql", "")
@@ -336,6 +394,9 @@ def main():
     except Exception as e:
         logger.error(f"服务器启动失败: {e}")
         raise
+    finally:
+        # 排空MCP会话池并停掉常驻循环
+        server.shutdown()
 
 
 if __name__ == "__main__":
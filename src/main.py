@@ -8,6 +8,8 @@ src/main.py
 
 import asyncio
 import json
+import queue
+import threading
 import uuid
 from datetime import datetime
 from typing import List, Dict, Tuple
@@ -28,6 +30,10 @@ class SmartVoyageCLI:
         self.timezone = pytz.timezone(config.timezone)
         self.messages: List[Dict] = []
         self.conversation_history: str = ""
+        # stdin读取走自有守护线程：to_thread占用默认executor的话，
+        # Ctrl-C退出时事件循环关闭会join还阻塞在input()上的工作线程
+        self._stdin_requests: queue.Queue = queue.Queue()
+        self._stdin_thread = None
         
         # 初始化Agent网络
         self.agent_network = AgentNetwork(name="SmartVoyage Network")
@@ -233,70 +239,114 @@ class SmartVoyageCLI:
             self.messages.append({"role": "assistant", "content": error_msg})
             return error_msg
     
-    def display_agent_cards(self):
+    async def display_agent_cards(self):
         """显示Agent卡片信息"""
         print("\n🛠️ Agent服务状态:")
         print("-" * 40)
-        
+
         agent_info = [
             ("WeatherQueryAssistant", config.agents.weather_url, "天气查询"),
             ("TicketQueryAssistant", config.agents.ticket_url, "票务查询"),
             ("TicketOrderAssistant", config.agents.order_url, "票务预订"),
         ]
-        
-        for name, url, desc in agent_info:
-            try:
-                card = self.agent_network.get_agent_card(name)
-                status = "✅ 在线"
-            except:
-                status = "❌ 离线"
-            
+
+        # 三个卡片探测互相独立，并发发起后再统一打印
+        probes = await asyncio.gather(
+            *(
+                asyncio.to_thread(self.agent_network.get_agent_card, name)
+                for name, _, _ in agent_info
+            ),
+            return_exceptions=True
+        )
+
+        for (name, url, desc), card in zip(agent_info, probes):
+            status = "❌ 离线" if isinstance(card, Exception) else "✅ 在线"
+
             print(f"  {name}")
             print(f"    描述: {desc}")
             print(f"    地址: {url}")
             print(f"    状态: {status}")
             print()
     
-    def run(self):
-        """运行CLI主循环"""
-        print("=" * 60)
-        print("🤖 SmartVoyage 智能旅行助手")
-        print("=" * 60)
-        print("欢迎使用！我可以帮您:")
-        print("  🌤️ 查询天气    🚄 查询火车票")
-        print("  ✈️ 查询机票    🎤 查询演唱会票")
-        print("  🎫 在线订票    🏞️ 推荐景点")
-        print("-" * 60)
-        print("命令: 输入 'quit' 退出, 'cards' 查看服务状态")
-        print("=" * 60)
-        
+    def _stdin_worker(self):
+        """守护线程：逐条处理读取请求，结果经call_soon_threadsafe回传"""
         while True:
+            prompt, loop, future = self._stdin_requests.get()
             try:
-                user_input = input("\n📝 请输入您的问题: ").strip()
-                
+                line = input(prompt)
+            except (EOFError, KeyboardInterrupt):
+                line = "quit"
+            try:
+                loop.call_soon_threadsafe(
+                    lambda f=future, value=line: f.done() or f.set_result(value)
+                )
+            except RuntimeError:
+                # 事件循环已关闭（退出路径），丢弃这一行即可
+                pass
+
+    async def _read_input(self, prompt: str) -> str:
+        """在守护线程上读取一行stdin，不占用事件循环的默认executor"""
+        if self._stdin_thread is None:
+            self._stdin_thread = threading.Thread(
+                target=self._stdin_worker, name="stdin-reader", daemon=True
+            )
+            self._stdin_thread.start()
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._stdin_requests.put((prompt, loop, future))
+        return await future
+
+    async def _run_loop(self):
+        """异步主循环
+
+        input在专用守护线程中执行，事件循环保持运行，
+        整个会话共用一个事件循环（连接、后台任务可跨轮次复用）
+        """
+        while True:
+            try:
+                user_input = (await self._read_input("\n📝 请输入您的问题: ")).strip()
+
                 if not user_input:
                     continue
-                
+
                 if user_input.lower() == 'quit':
                     print("\n感谢使用 SmartVoyage！再见！👋")
                     break
-                
+
                 if user_input.lower() == 'cards':
-                    self.display_agent_cards()
+                    await self.display_agent_cards()
                     continue
-                
+
                 # 处理用户输入
                 print("\n⏳ 正在处理您的请求...")
-                response = asyncio.run(self.process_input(user_input))
+                response = await self.process_input(user_input)
                 print(f"\n🤖 助手回复:\n{response}")
-                
-            except KeyboardInterrupt:
-                print("\n\n感谢使用 SmartVoyage！再见！👋")
+
+            except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error(f"运行错误: {e}")
                 print(f"\n❌ 发生错误: {e}")
 
+    def run(self):
+        """运行CLI主循环"""
+        print("=" * 60)
+        print("🤖 SmartVoyage 智能旅行助手")
+        print("=" * 60)
+        print("欢迎使用！我可以帮您:")
+        print("  🌤️ 查询天气    🚄 查询火车票")
+        print("  ✈️ 查询机票    🎤 查询演唱会票")
+        print("  🎫 在线订票    🏞️ 推荐景点")
+        print("-" * 60)
+        print("命令: 输入 'quit' 退出, 'cards' 查看服务状态")
+        print("=" * 60)
+
+        try:
+            asyncio.run(self._run_loop())
+        except KeyboardInterrupt:
+            print("\n\n感谢使用 SmartVoyage！再见！👋")
+
 
 def main():
     """主函数"""
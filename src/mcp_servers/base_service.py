@@ -15,21 +15,7 @@ import mysql.connector
 from mysql.connector import Error as MySQLError
 
 from src.config import config, logger
-
-
-class DateTimeEncoder(json.JSONEncoder):
-    """自定义JSON编码器，处理日期时间类型"""
-
-    def default(self, obj):
-        if isinstance(obj, datetime):
-            return obj.strftime('%Y-%m-%d %H:%M:%S')
-        if isinstance(obj, date):
-            return obj.strftime('%Y-%m-%d')
-        if isinstance(obj, timedelta):
-            return str(obj)
-        if isinstance(obj, Decimal):
-            return float(obj)
-        return super().default(obj)
+from src.utils.formatters import DateTimeEncoder, encode_special_types
 
 
 class DatabaseService:
@@ -87,7 +73,7 @@ class DatabaseService:
             for row in results:
                 for key, value in row.items():
                     if isinstance(value, (date, datetime, timedelta, Decimal)):
-                        row[key] = self._encode_value(value)
+                        row[key] = encode_special_types(value)
 
             if results:
                 return json.dumps(
@@ -170,18 +156,6 @@ class DatabaseService:
             self._conn.rollback()
             return {"status": "error", "message": str(e)}
 
-    def _encode_value(self, value: Any) -> Any:
-        """编码特殊类型值"""
-        if isinstance(value, datetime):
-            return value.strftime('%Y-%m-%d %H:%M:%S')
-        if isinstance(value, date):
-            return value.strftime('%Y-%m-%d')
-        if isinstance(value, timedelta):
-            return str(value)
-        if isinstance(value, Decimal):
-            return float(value)
-        return value
-
     def close(self):
         """关闭数据库连接"""
         if self._conn and self._conn.is_connected():
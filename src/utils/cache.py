@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+SmartVoyage 缓存工具模块
+src/utils/cache.py
+
+提供LLM调用结果的相似度缓存
+"""
+
+import re
+from collections import Counter, OrderedDict
+from math import sqrt
+from typing import Any, Optional, Tuple
+
+
+# 关键实体：数字串、中文数量词、相对日期词、受支持的城市名。
+# 二元组相似度只衡量措辞接近程度，这些字段一字之差就是另一个
+# 查询（日期、数量、手机号、方向），命中前必须逐一完全相等
+_ENTITY_RE = re.compile(
+    r"[0-9０-９]+"
+    r"|[一二三四五六七八九十两百千]+"
+    r"|今天|明天|大后天|后天|这周|本周|下周|周末"
+    r"|北京|上海|广州|深圳|杭州|成都|重庆"
+)
+
+
+def _entity_signature(text: str) -> Tuple[str, ...]:
+    """
+    提取文本中的关键实体序列（顺序敏感）
+
+    Args:
+        text: 输入文本
+
+    Returns:
+        按出现顺序排列的实体元组
+    """
+    return tuple(_ENTITY_RE.findall(text))
+
+
+def _bigram_vector(text: str) -> Counter:
+    """
+    计算文本的字符二元组频率向量
+
+    Args:
+        text: 输入文本
+
+    Returns:
+        二元组计数向量
+    """
+    text = text.strip()
+    if len(text) < 2:
+        return Counter([text]) if text else Counter()
+    return Counter(text[i:i + 2] for i in range(len(text) - 1))
+
+
+def cosine_similarity(a: Counter, b: Counter) -> float:
+    """
+    计算两个稀疏频率向量的余弦相似度
+
+    Args:
+        a: 向量A
+        b: 向量B
+
+    Returns:
+        相似度 [0, 1]
+    """
+    if not a or not b:
+        return 0.0
+
+    dot = sum(count * b[key] for key, count in a.items())
+    if not dot:
+        return 0.0
+
+    norm_a = sqrt(sum(count * count for count in a.values()))
+    norm_b = sqrt(sum(count * count for count in b.values()))
+    return dot / (norm_a * norm_b)
+
+
+class SemanticCache:
+    """
+    近似语义缓存
+
+    以字符二元组余弦相似度近似语义相似度，对中文短查询足够区分，
+    无需外部embedding模型。namespace用于隔离不同上下文（如当前日期），
+    避免"明天"等相对日期词跨天复用过期结果。
+
+    相似度之外还要求关键实体（数字、日期词、城市）序列完全相等：
+    长查询里单个字符的差异会被整体相似度摊薄（改一天日期仍可超过
+    阈值），实体门禁保证近似命中只吸收措辞差异，不吸收语义差异。
+    """
+
+    def __init__(self, maxsize: int = 256, threshold: float = 0.92):
+        """
+        初始化缓存
+
+        Args:
+            maxsize: 最大缓存条目数（LRU淘汰）
+            threshold: 命中所需的最低相似度
+        """
+        self.maxsize = maxsize
+        self.threshold = threshold
+        # (namespace, text) -> (向量, 实体签名, 缓存值)
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, text: str, namespace: str = "") -> Optional[Any]:
+        """
+        查找与text最相似的缓存值
+
+        Args:
+            text: 查询文本
+            namespace: 缓存命名空间
+
+        Returns:
+            相似度达到阈值的缓存值，未命中返回None
+        """
+        vector = _bigram_vector(text)
+        signature = _entity_signature(text)
+        best_key = None
+        best_score = 0.0
+
+        for key, (cached_vector, cached_signature, _) in self._entries.items():
+            if key[0] != namespace or cached_signature != signature:
+                continue
+            score = cosine_similarity(vector, cached_vector)
+            if score > best_score:
+                best_key = key
+                best_score = score
+
+        if best_key is not None and best_score >= self.threshold:
+            self._entries.move_to_end(best_key)
+            return self._entries[best_key][2]
+        return None
+
+    def put(self, text: str, value: Any, namespace: str = "") -> None:
+        """
+        写入缓存
+
+        Args:
+            text: 查询文本
+            value: 缓存值
+            namespace: 缓存命名空间
+        """
+        key = (namespace, text)
+        self._entries[key] = (_bigram_vector(text), _entity_signature(text), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
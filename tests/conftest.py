@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""
+测试共享fixture
+tests/conftest.py
+"""
+
+import pytest_asyncio
+
+from tests import test_agents
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session", autouse=True)
+async def shared_http_client():
+    """会话结束时在同一个事件循环上关闭共享的HTTP客户端"""
+    yield
+    await test_agents.close_client()
@@ -7,41 +7,131 @@ tests/test_agents.py
 """
 
 import asyncio
-import json
-import uuid
+import functools
 from datetime import datetime, timedelta
+from secrets import token_hex
 
+import orjson
 import pytest
 import httpx
 
+try:
+    from aiolimiter import AsyncLimiter
+except ImportError:
+    AsyncLimiter = None
+
 
 # 服务地址
 WEATHER_AGENT_URL = "http://localhost:5005"
 TICKET_AGENT_URL = "http://localhost:5006"
 ORDER_AGENT_URL = "http://localhost:5007"
 
+# 每次运行只计算一次"明天"的日期，供所有用例复用
+TOMORROW_YMD = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+
+# 共享HTTP客户端（懒加载，跨用例复用TCP/keepalive连接）
+_client = None
+
+# 并发上限信号量：按需背压，替代固定sleep式限流（需在事件循环内创建）
+_send_semaphore = None
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    """获取共享的并发限流信号量，首次调用时创建"""
+    global _send_semaphore
+    if _send_semaphore is None:
+        _send_semaphore = asyncio.Semaphore(4)
+    return _send_semaphore
+
+
+# 令牌桶限流器：精确限速的同时允许请求重叠（需在事件循环内创建）
+_rate_limiter = None
+
+
+def _get_limiter():
+    """获取共享限流器：优先aiolimiter令牌桶，未安装时退回并发信号量"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        if AsyncLimiter is not None:
+            _rate_limiter = AsyncLimiter(10, 1.0)
+        else:
+            _rate_limiter = _get_semaphore()
+    return _rate_limiter
+
+
+async def get_client() -> httpx.AsyncClient:
+    """获取共享的AsyncClient，首次调用时创建"""
+    global _client
+    if _client is None:
+        # 放宽连接池限制：并发压测时避免排队等待空闲连接，
+        # keepalive_expiry延长到30s，跨用例间隔也能复用连接
+        limits = httpx.Limits(
+            max_keepalive_connections=40,
+            max_connections=100,
+            keepalive_expiry=30
+        )
+        try:
+            # HTTP/2: 并发请求复用单个socket多路复用，避免连接池争抢
+            _client = httpx.AsyncClient(http2=True, timeout=30.0, limits=limits)
+        except ImportError:
+            # 未安装h2扩展时退回HTTP/1.1
+            _client = httpx.AsyncClient(timeout=30.0, limits=limits)
+
+        # 预热：提前完成DNS解析和TCP握手，首个计时用例不再付冷启动成本
+        await asyncio.gather(
+            *(
+                _client.get(f"{url}/.well-known/agent.json")
+                for url in (WEATHER_AGENT_URL, TICKET_AGENT_URL, ORDER_AGENT_URL)
+            ),
+            return_exceptions=True
+        )
+    return _client
+
+
+async def close_client():
+    """关闭共享的AsyncClient"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
 
-async def send_a2a_request(url: str, message: str) -> dict:
-    """发送A2A请求"""
-    request_data = {
-        "jsonrpc": "2.0",
-        "method": "tasks/send",
-        "params": {
-            "message": {
-                "role": "user",
-                "content": message
-            }
-        },
-        "id": str(uuid.uuid4())
-    }
-
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        response = await client.post(
+
+# 预序列化的JSON-RPC骨架，发送时只拼接message字节和唯一id
+_BODY_PREFIX = b'{"jsonrpc":"2.0","method":"tasks/send","params":{"message":'
+_BODY_SUFFIX = b'},"id":"'
+
+
+@functools.lru_cache(maxsize=256)
+def _encode_message(message: str) -> bytes:
+    """缓存重复查询文本的序列化结果"""
+    return orjson.dumps({"role": "user", "content": message})
+
+
+async def send_a2a_request(url: str, message: str, per_call_timeout: float = None) -> dict:
+    """发送A2A请求
+
+    Args:
+        url: Agent服务地址
+        message: 用户消息
+        per_call_timeout: 单次调用超时（秒），探测类用例用短超时快速失败
+    """
+    body = (
+        _BODY_PREFIX + _encode_message(message)
+        + _BODY_SUFFIX + token_hex(16).encode() + b'"}'
+    )
+
+    client = await get_client()
+    async with _get_limiter():
+        request = client.post(
             f"{url}/a2a",
-            json=request_data,
+            content=body,
             headers={"Content-Type": "application/json"}
         )
-        return response.json()
+        if per_call_timeout:
+            response = await asyncio.wait_for(request, timeout=per_call_timeout)
+        else:
+            response = await request
+    return orjson.loads(response.content)
 
 
 def extract_content(result: dict) -> str:
@@ -87,7 +177,8 @@ class TestWeatherAgent:
         """测试缺少城市的天气查询"""
         result = await send_a2a_request(
             WEATHER_AGENT_URL,
-            "明天天气"
+            "明天天气",
+            per_call_timeout=10
         )
 
         state = extract_state(result)
@@ -96,12 +187,12 @@ class TestWeatherAgent:
     @pytest.mark.asyncio
     async def test_agent_card(self):
         """测试获取Agent卡片"""
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(f"{WEATHER_AGENT_URL}/.well-known/agent.json")
+        client = await get_client()
+        response = await client.get(f"{WEATHER_AGENT_URL}/.well-known/agent.json")
 
         assert response.status_code == 200
 
-        card = response.json()
+        card = orjson.loads(response.content)
         assert card.get("name") == "WeatherQueryAgent"
         assert "skills" in card
 
@@ -112,11 +203,9 @@ class TestTicketAgent:
     @pytest.mark.asyncio
     async def test_query_train_ticket(self):
         """测试火车票查询"""
-        tomorrow = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
-
         result = await send_a2a_request(
             TICKET_AGENT_URL,
-            f"查询{tomorrow}北京到上海的高铁票"
+            f"查询{TOMORROW_YMD}北京到上海的高铁票"
         )
 
         state = extract_state(result)
@@ -151,7 +240,8 @@ class TestTicketAgent:
         """测试信息不足的查询"""
         result = await send_a2a_request(
             TICKET_AGENT_URL,
-            "火车票"
+            "火车票",
+            per_call_timeout=10
         )
 
         state = extract_state(result)
@@ -200,28 +290,49 @@ class TestOrderAgent:
         assert state in ["completed", "failed", "input_required"]
 
 
+class TestFullBookingFlow:
+    """测试查询+订票完整流程"""
+
+    @pytest.mark.asyncio
+    async def test_query_and_book_concurrent(self):
+        """余票查询只是参考信息，订票Agent自己会再查一次，两步可并发"""
+        query_result, book_result = await asyncio.gather(
+            send_a2a_request(
+                TICKET_AGENT_URL,
+                f"查询{TOMORROW_YMD}北京到上海的高铁票"
+            ),
+            send_a2a_request(
+                ORDER_AGENT_URL,
+                f"订一张{TOMORROW_YMD}北京到上海的高铁票，二等座，张三，13800138000"
+            )
+        )
+
+        assert extract_state(query_result) in ["completed", "input_required"]
+        assert extract_state(book_result) in ["completed", "input_required", "failed"]
+
+
 class TestAgentHealth:
     """测试Agent健康状态"""
 
     @pytest.mark.asyncio
     async def test_weather_agent_health(self):
         """测试天气Agent健康状态"""
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.get(f"{WEATHER_AGENT_URL}/.well-known/agent.json")
+        client = await get_client()
+        response = await client.get(f"{WEATHER_AGENT_URL}/.well-known/agent.json")
         assert response.status_code == 200
 
     @pytest.mark.asyncio
     async def test_ticket_agent_health(self):
         """测试票务Agent健康状态"""
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.get(f"{TICKET_AGENT_URL}/.well-known/agent.json")
+        client = await get_client()
+        response = await client.get(f"{TICKET_AGENT_URL}/.well-known/agent.json")
         assert response.status_code == 200
 
     @pytest.mark.asyncio
     async def test_order_agent_health(self):
         """测试订票Agent健康状态"""
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.get(f"{ORDER_AGENT_URL}/.well-known/agent.json")
+        client = await get_client()
+        response = await client.get(f"{ORDER_AGENT_URL}/.well-known/agent.json")
         assert response.status_code == 200
 
 
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+单元测试
+tests/test_cache.py
+
+测试缓存工具
+"""
+
+import pytest
+from src.utils.cache import SemanticCache, cosine_similarity, _bigram_vector
+
+
+class TestSemanticCache:
+    """测试SemanticCache类"""
+
+    def test_exact_hit(self):
+        """测试完全相同文本命中"""
+        cache = SemanticCache()
+        cache.put("订明天北京到上海的高铁票", {"status": "ready"})
+        assert cache.get("订明天北京到上海的高铁票") == {"status": "ready"}
+
+    def test_similar_hit(self):
+        """测试措辞不同但实体相同的文本命中"""
+        cache = SemanticCache(threshold=0.6)
+        cache.put("查询明天北京到上海的高铁票", {"status": "ready"})
+        assert cache.get("明天北京到上海的高铁票查询") == {"status": "ready"}
+
+    def test_entity_mismatch_miss(self):
+        """测试实体不同的近似文本不命中（数量/日期/号码一字之差）"""
+        cache = SemanticCache(threshold=0.6)
+        cache.put("订3张明天北京到上海的高铁票，张三，13800138000", 1)
+        assert cache.get("订2张明天北京到上海的高铁票，张三，13800138000") is None
+        assert cache.get("订3张后天北京到上海的高铁票，张三，13800138000") is None
+        assert cache.get("订3张明天北京到上海的高铁票，张三，13800138001") is None
+
+    def test_dissimilar_miss(self):
+        """测试不相关文本不命中"""
+        cache = SemanticCache()
+        cache.put("订明天北京到上海的高铁票", {"status": "ready"})
+        assert cache.get("周杰伦广州演唱会门票") is None
+
+    def test_namespace_isolation(self):
+        """测试命名空间隔离"""
+        cache = SemanticCache()
+        cache.put("订明天的高铁票", {"date": "2026-01-19"}, namespace="2026-01-18")
+        assert cache.get("订明天的高铁票", namespace="2026-01-19") is None
+
+    def test_lru_eviction(self):
+        """测试超出容量后淘汰最旧条目"""
+        cache = SemanticCache(maxsize=2)
+        cache.put("查询北京天气", 1)
+        cache.put("查询上海机票", 2)
+        cache.put("查询广州演唱会", 3)
+        assert len(cache) == 2
+        assert cache.get("查询北京天气") is None
+
+
+class TestCosineSimilarity:
+    """测试余弦相似度"""
+
+    def test_identical(self):
+        """测试相同文本相似度为1"""
+        v = _bigram_vector("北京到上海")
+        assert cosine_similarity(v, v) == pytest.approx(1.0)
+
+    def test_empty(self):
+        """测试空向量相似度为0"""
+        assert cosine_similarity(_bigram_vector(""), _bigram_vector("北京")) == 0.0